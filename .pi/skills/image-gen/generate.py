@@ -4,21 +4,77 @@
 import argparse
 import base64
 import datetime as dt
+import email.utils
+import functools
+import http.client
+import io
 import json
 import os
+import random
 import re
+import shutil
 import sys
+import threading
+import time
 import urllib.error
+import urllib.parse
 import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from html import escape as _html_escape
 from pathlib import Path
 
+API_HOST = "api.openai.com"
+RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+BACKOFF_CAP = 60.0
+RETRY_AFTER_CAP = 300.0
+DOWNLOAD_CHUNK_MIN = 128 * 1024
+DOWNLOAD_CHUNK_MAX = 1024 * 1024
+
+_SLUG_NONALNUM = re.compile(r"[^a-z0-9]+")
+_SLUG_DASHES = re.compile(r"-{2,}")
+
+# One keep-alive HTTPS connection per worker thread, reused across requests
+_local = threading.local()
+_stdout_lock = threading.Lock()
+
 
 def slugify(text: str) -> str:
     """Convert text to URL-safe slug."""
-    text = text.lower().strip()
-    text = re.sub(r"[^a-z0-9]+", "-", text)
-    text = re.sub(r"-{2,}", "-", text).strip("-")
-    return text or "image"
+    text = _SLUG_NONALNUM.sub("-", text.lower().strip())
+    return _SLUG_DASHES.sub("-", text).strip("-") or "image"
+
+
+class TokenBucket:
+    """Thread-safe token bucket capping requests per minute."""
+
+    def __init__(self, rpm: int):
+        # A one-token bucket that starts with one token spaces requests 60/rpm
+        # seconds apart, so no 60s window ever sees more than rpm requests
+        self.capacity = 1.0
+        self.rate = max(1, rpm) / 60.0
+        self.tokens = 1.0
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a request token is available."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def log(*lines: str) -> None:
+    """Write progress lines to stdout in one locked write, safe across workers."""
+    with _stdout_lock:
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
 
 
 def default_out_dir() -> Path:
@@ -41,6 +97,108 @@ def get_model_defaults(model: str) -> tuple:
         return ("1024x1024", "high")
 
 
+def retry_after_seconds(headers) -> float:
+    """Return the Retry-After delay in seconds, or 0 if absent/unparseable."""
+    value = headers.get("Retry-After") if headers else None
+    if not value:
+        return 0.0
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return 0.0
+    if when.tzinfo is None:
+        # parsedate_to_datetime returns a naive datetime for a "-0000" zone
+        when = when.replace(tzinfo=dt.timezone.utc)
+    return max(0.0, (when - dt.datetime.now(dt.timezone.utc)).total_seconds())
+
+
+def with_retries(fn, max_attempts: int = 3, backoff_base: float = 1.0):
+    """Wrap fn so transient HTTP/network failures are retried with backoff + jitter."""
+
+    attempts = max(1, max_attempts)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        for attempt in range(attempts):
+            last = attempt == attempts - 1
+            try:
+                return fn(*args, **kwargs)
+            except urllib.error.HTTPError as e:
+                if last or e.code not in RETRYABLE_STATUS:
+                    raise
+                # Honour Retry-After, but don't let the server park the batch for hours
+                floor = min(RETRY_AFTER_CAP, retry_after_seconds(e.headers))
+            except (urllib.error.URLError, ConnectionError, TimeoutError, http.client.HTTPException):
+                if last:
+                    raise
+                floor = 0.0
+            delay = min(BACKOFF_CAP, backoff_base * 2 ** attempt) + random.uniform(0, backoff_base)
+            time.sleep(max(floor, delay))
+
+    return wrapper
+
+
+def https_connection(host: str, timeout: float) -> http.client.HTTPSConnection:
+    """Open an HTTPS connection to host, tunnelling through HTTPS_PROXY if set."""
+    proxy = urllib.request.getproxies().get("https")
+    if not proxy or urllib.request.proxy_bypass(host):
+        return http.client.HTTPSConnection(host, timeout=timeout)
+    parts = urllib.parse.urlsplit(proxy if "://" in proxy else "http://" + proxy)
+    conn = http.client.HTTPSConnection(parts.hostname, parts.port or 8080, timeout=timeout)
+    tunnel_headers = {}
+    if parts.username:
+        creds = f"{urllib.parse.unquote(parts.username)}:{urllib.parse.unquote(parts.password or '')}"
+        tunnel_headers["Proxy-Authorization"] = "Basic " + base64.b64encode(creds.encode()).decode()
+    conn.set_tunnel(host, 443, headers=tunnel_headers)
+    return conn
+
+
+def api_connection() -> http.client.HTTPSConnection:
+    """Return this thread's persistent connection to the OpenAI API."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = https_connection(API_HOST, timeout=300)
+        _local.conn = conn
+    return conn
+
+
+def post_json(path: str, body: bytes, headers: dict) -> dict:
+    """POST to the OpenAI API over the pooled connection and decode the JSON reply."""
+    conn = api_connection()
+    try:
+        conn.request("POST", path, body=body, headers=headers)
+        resp = conn.getresponse()
+        payload = resp.read()
+    except BaseException:
+        # Drop the broken connection; with_retries decides whether to try again,
+        # and the next attempt reconnects automatically
+        conn.close()
+        raise
+    if resp.status >= 400:
+        raise urllib.error.HTTPError(
+            f"https://{API_HOST}{path}", resp.status, resp.reason, resp.headers, io.BytesIO(payload)
+        )
+    return json.loads(payload.decode("utf-8"))
+
+
+def download_file(url: str, filepath: Path) -> None:
+    """Stream an image URL to disk using large read chunks."""
+    with urllib.request.urlopen(url, timeout=300) as resp:
+        length = int(resp.headers.get("Content-Length") or 0)
+        chunk_size = min(DOWNLOAD_CHUNK_MAX, max(DOWNLOAD_CHUNK_MIN, length // 100))
+        with open(filepath, "wb") as f:
+            shutil.copyfileobj(resp, f, chunk_size)
+
+
+def decode_and_write(filepath: Path, image_b64: str) -> None:
+    """Decode a base64 image body and write it to disk."""
+    filepath.write_bytes(base64.b64decode(image_b64))
+
+
 def request_images(
     api_key: str,
     prompt: str,
@@ -50,9 +208,14 @@ def request_images(
     background: str = "",
     output_format: str = "",
     style: str = "",
+    max_attempts: int = 3,
+    backoff_base: float = 1.0,
+    limiter: "TokenBucket | None" = None,
 ) -> dict:
-    """Make API request to OpenAI Images API."""
-    url = "https://api.openai.com/v1/images/generations"
+    """Make API request to OpenAI Images API.
+
+    If limiter is given, every attempt (retries included) takes a token from it.
+    """
     args = {
         "model": model,
         "prompt": prompt,
@@ -77,18 +240,18 @@ def request_images(
         args["style"] = style
 
     body = json.dumps(args).encode("utf-8")
-    req = urllib.request.Request(
-        url,
-        method="POST",
-        headers={
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json",
-        },
-        data=body,
-    )
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+    }
+
+    def attempt() -> dict:
+        if limiter:
+            limiter.acquire()
+        return post_json("/v1/images/generations", body, headers)
+
     try:
-        with urllib.request.urlopen(req, timeout=300) as resp:
-            return json.loads(resp.read().decode("utf-8"))
+        return with_retries(attempt, max_attempts, backoff_base)()
     except urllib.error.HTTPError as e:
         payload = e.read().decode("utf-8", errors="replace")
         raise RuntimeError(f"OpenAI Images API failed ({e.code}): {payload}") from e
@@ -96,19 +259,9 @@ def request_images(
 
 def write_gallery(out_dir: Path, items: list) -> None:
     """Write HTML gallery with generated images."""
-    from html import escape as html_escape
-    
-    thumbs = "\n".join(
-        [
-            f"""<figure>
-  <a href="{html_escape(it["file"], quote=True)}"><img src="{html_escape(it["file"], quote=True)}" loading="lazy" /></a>
-  <figcaption>{html_escape(it["prompt"])}</figcaption>
-</figure>""".strip()
-            for it in items
-        ]
-    )
-    
-    html = f"""<!doctype html>
+    esc = _html_escape  # local binding for the per-item loop
+
+    header = f"""<!doctype html>
 <meta charset="utf-8" />
 <title>image-gen</title>
 <style>
@@ -122,12 +275,23 @@ def write_gallery(out_dir: Path, items: list) -> None:
   code {{ color: #9cd1ff; }}
 </style>
 <h1>image-gen</h1>
-<p>Output: <code>{html_escape(out_dir.as_posix())}</code></p>
+<p>Output: <code>{esc(out_dir.as_posix())}</code></p>
 <div class="grid">
-{thumbs}
-</div>
 """
-    (out_dir / "index.html").write_text(html, encoding="utf-8")
+
+    # Stream one figure at a time instead of building the whole page in memory
+    with (out_dir / "index.html").open("w", encoding="utf-8", buffering=1 << 20) as f:
+        f.write(header)
+        for it in items:
+            src = esc(it["file"], quote=True)
+            f.write(
+                f"""<figure>
+  <a href="{src}"><img src="{src}" loading="lazy" /></a>
+  <figcaption>{esc(it["prompt"])}</figcaption>
+</figure>
+"""
+            )
+        f.write("</div>\n")
 
 
 def main() -> int:
@@ -141,6 +305,10 @@ def main() -> int:
     ap.add_argument("--output-format", default="", help="Output format (GPT models): png, jpeg, webp.")
     ap.add_argument("--style", default="", help="Image style (DALL-E 3): vivid, natural.")
     ap.add_argument("--out-dir", default="", help="Output directory.")
+    ap.add_argument("--concurrency", type=int, default=4, help="Maximum number of requests in flight.")
+    ap.add_argument("--rpm", type=int, default=0, help="Maximum requests per minute (0 = unlimited).")
+    ap.add_argument("--max-attempts", type=int, default=3, help="Attempts per request on 429/5xx/network errors.")
+    ap.add_argument("--backoff-base", type=float, default=1.0, help="Base delay in seconds for exponential backoff.")
     args = ap.parse_args()
 
     api_key = (os.environ.get("OPENAI_API_KEY") or "").strip()
@@ -156,7 +324,7 @@ def main() -> int:
 
     count = args.count
     if args.model == "dall-e-3" and count > 1:
-        print(f"Warning: DALL-E 3 only supports 1 image per request. Generating {count} sequential requests.", file=sys.stderr)
+        print(f"Warning: DALL-E 3 only supports 1 image per request. Generating {count} separate requests.", file=sys.stderr)
 
     out_dir = Path(args.out_dir).expanduser() if args.out_dir else default_out_dir()
     out_dir.mkdir(parents=True, exist_ok=True)
@@ -167,12 +335,11 @@ def main() -> int:
     else:
         file_ext = "png"
 
-    items: list = []
-    
-    for i in range(count):
-        print(f"Generating image {i+1}/{count}...")
-        
-        res = request_images(
+    bucket = TokenBucket(args.rpm) if args.rpm > 0 else None
+
+    def generate(index: int) -> dict:
+        log(f"Generating image {index+1}/{count}...")
+        return request_images(
             api_key,
             args.prompt,
             args.model,
@@ -181,39 +348,70 @@ def main() -> int:
             args.background,
             args.output_format,
             args.style,
+            args.max_attempts,
+            args.backoff_base,
+            bucket,
         )
-        
-        data = res.get("data", [{}])[0]
-        image_b64 = data.get("b64_json")
-        image_url = data.get("url")
-        
-        if not image_b64 and not image_url:
-            print(f"Error: Unexpected response: {json.dumps(res)[:400]}", file=sys.stderr)
-            return 1
-
-        filename = f"{len(items)+1:03d}-{slugify(args.prompt)[:40]}.{file_ext}"
-        filepath = out_dir / filename
-        
-        if image_b64:
-            filepath.write_bytes(base64.b64decode(image_b64))
-        else:
-            try:
-                urllib.request.urlretrieve(image_url, filepath)
-            except urllib.error.URLError as e:
-                print(f"Error: Failed to download image from {image_url}: {e}", file=sys.stderr)
-                return 1
 
-        items.append({"prompt": args.prompt, "file": filename})
+    # The prompt is the same for every image, so slug and filenames are fixed up front
+    slug = slugify(args.prompt)[:40]
+    filenames = [f"{i+1:03d}-{slug}.{file_ext}" for i in range(count)]
+
+    download = with_retries(download_file, args.max_attempts, args.backoff_base)
+    results: dict = {}
+    workers = max(1, min(args.concurrency, count))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool, ThreadPoolExecutor(max_workers=4) as io_pool:
+        futures = {pool.submit(generate, i): i for i in range(count)}
+        saves: dict = {}
+        try:
+            for future in as_completed(futures):
+                i = futures[future]
+                res = future.result()
+
+                data = res.get("data", [{}])[0]
+                image_b64 = data.get("b64_json")
+                image_url = data.get("url")
+
+                if not image_b64 and not image_url:
+                    print(f"Error: Unexpected response: {json.dumps(res)[:400]}", file=sys.stderr)
+                    return 1
+
+                # Decoding/downloading runs on the I/O pool so the next response isn't held up
+                filepath = out_dir / filenames[i]
+                if image_b64:
+                    saves[i] = (io_pool.submit(decode_and_write, filepath, image_b64), None)
+                else:
+                    saves[i] = (io_pool.submit(download, image_url, filepath), image_url)
+
+            for i, (save, image_url) in saves.items():
+                try:
+                    save.result()
+                except urllib.error.URLError as e:
+                    print(f"Error: Failed to download image from {image_url}: {e}", file=sys.stderr)
+                    return 1
+                results[i] = {"prompt": args.prompt, "file": filenames[i]}
+        finally:
+            # Don't keep issuing paid requests once the batch has failed
+            for future in futures:
+                future.cancel()
+            for save, _ in saves.values():
+                save.cancel()
+
+    items: list = [results[i] for i in sorted(results)]
 
     # Write metadata
-    (out_dir / "prompts.json").write_text(json.dumps(items, indent=2), encoding="utf-8")
+    with (out_dir / "prompts.json").open("w", encoding="utf-8") as f:
+        json.dump(items, f, indent=2)
     
     # Write gallery
     write_gallery(out_dir, items)
     
-    print(f"\nGenerated {len(items)} image(s)")
-    print(f"Output: {out_dir}")
-    print(f"Gallery: {out_dir / 'index.html'}")
+    log(
+        f"\nGenerated {len(items)} image(s)",
+        f"Output: {out_dir}",
+        f"Gallery: {out_dir / 'index.html'}",
+    )
     
     return 0
 
@@ -4,21 +4,37 @@ Edit PDF files using nano-pdf CLI or direct PyPDF2/pdfplumber operations.
 
 Usage:
     python edit_pdf.py --input input.pdf --page 1 --instruction "Change title to 'Q3 Results'"
+    python edit_pdf.py --input input.pdf --pages 1 2 3 --instructions "Fix the typo in the footer" --output-dir ./edited/
     python edit_pdf.py --input input.pdf --merge file2.pdf --output merged.pdf
     python edit_pdf.py --input input.pdf --split --output-dir ./pages/
 """
 
 import argparse
+import asyncio
+import contextlib
+import functools
+import mmap
+import os
 import subprocess
 import sys
 from pathlib import Path
 
+try:
+    from PyPDF2 import PdfMerger, PdfReader, PdfWriter
+    _HAS_PYPDF2 = True
+except ImportError:
+    _HAS_PYPDF2 = False
 
+# Inputs at least this large are memory-mapped instead of read into memory
+MMAP_THRESHOLD = 32 * 1024 * 1024
+
+
+@functools.lru_cache(maxsize=1)
 def check_nano_pdf_installed():
-    """Check if nano-pdf CLI is available."""
+    """Check if nano-pdf CLI is available (probed once per process)."""
     try:
-        result = subprocess.run(['nano-pdf', '--version'], 
-                                capture_output=True, text=True, timeout=5)
+        result = subprocess.run(['nano-pdf', '--version'],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=5)
         return result.returncode == 0
     except (FileNotFoundError, subprocess.TimeoutExpired):
         return False
@@ -50,11 +66,79 @@ def edit_with_nanopdf(input_path: str, page: int, instruction: str, output_path:
         return False
 
 
+def _require_pypdf2():
+    """Report a missing PyPDF2 install; return True when it is available."""
+    if not _HAS_PYPDF2:
+        print("Error: PyPDF2 not installed. Run: pip install PyPDF2", file=sys.stderr)
+    return _HAS_PYPDF2
+
+
+async def _edit_one(input_path: str, page: int, instruction: str, output_path: str,
+                    semaphore: asyncio.Semaphore):
+    """Run one `nano-pdf edit` subprocess, bounded by the shared semaphore."""
+    async with semaphore:
+        proc = await asyncio.create_subprocess_exec(
+            'nano-pdf', 'edit', input_path, str(page), instruction, '--output', output_path,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            _, stderr = await asyncio.wait_for(proc.communicate(), timeout=120)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            print(f"Error: nano-pdf operation timed out on page {page}", file=sys.stderr)
+            return False
+    
+    if proc.returncode != 0:
+        print(f"nano-pdf error on page {page}: {stderr.decode(errors='replace')}", file=sys.stderr)
+        return False
+    print(f"Successfully edited page {page} -> {output_path}")
+    return True
+
+
+async def _edit_many(input_path: str, jobs: list, max_parallel: int):
+    """Run all edit jobs concurrently, at most max_parallel at a time."""
+    semaphore = asyncio.Semaphore(max(1, max_parallel))
+    return await asyncio.gather(
+        *(_edit_one(input_path, page, instr, out, semaphore) for page, instr, out in jobs),
+        return_exceptions=True
+    )
+
+
+def edit_pages_with_nanopdf(input_path: str, jobs: list, max_parallel: int = None):
+    """Run several independent nano-pdf edits concurrently.
+    
+    Each job is a (page, instruction, output_path) tuple. At most
+    max_parallel edits run at once (default: one per CPU).
+    """
+    results = asyncio.run(_edit_many(input_path, jobs, max_parallel or os.cpu_count() or 1))
+    for (page, _, _), result in zip(jobs, results):
+        if isinstance(result, Exception):
+            print(f"Error running nano-pdf on page {page}: {result}", file=sys.stderr)
+    return all(result is True for result in results)
+
+
+@contextlib.contextmanager
+def _open_reader(input_path: str):
+    """Open a PdfReader, memory-mapping large files.
+    
+    Given a path, PyPDF2 reads the whole file into a BytesIO up front. For
+    large inputs an mmap lets the OS page in only the objects actually used.
+    """
+    if os.path.getsize(input_path) < MMAP_THRESHOLD:
+        yield PdfReader(input_path)
+        return
+    
+    with open(input_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        yield PdfReader(mm)
+
+
 def merge_pdfs(input_files: list, output_path: str):
     """Merge multiple PDFs using PyPDF2."""
+    if not _require_pypdf2():
+        return False
+    
     try:
-        from PyPDF2 import PdfMerger
-        
         merger = PdfMerger()
         for pdf_file in input_files:
             if Path(pdf_file).exists():
@@ -67,9 +151,6 @@ def merge_pdfs(input_files: list, output_path: str):
         merger.close()
         print(f"Successfully merged {len(input_files)} files into: {output_path}")
         return True
-    except ImportError:
-        print("Error: PyPDF2 not installed. Run: pip install PyPDF2", file=sys.stderr)
-        return False
     except Exception as e:
         print(f"Error merging PDFs: {e}", file=sys.stderr)
         return False
@@ -77,25 +158,26 @@ def merge_pdfs(input_files: list, output_path: str):
 
 def split_pdf(input_path: str, output_dir: str):
     """Split PDF into individual pages."""
+    if not _require_pypdf2():
+        return False
+    
     try:
-        from PyPDF2 import PdfReader, PdfWriter
-        
-        reader = PdfReader(input_path)
-        Path(output_dir).mkdir(parents=True, exist_ok=True)
-        
-        for i, page in enumerate(reader.pages):
-            writer = PdfWriter()
-            writer.add_page(page)
-            output_file = Path(output_dir) / f"page_{i+1:03d}.pdf"
+        with _open_reader(input_path) as reader:
+            Path(output_dir).mkdir(parents=True, exist_ok=True)
             
-            with open(output_file, 'wb') as f:
-                writer.write(f)
+            # Pages are written one at a time: PdfReader resolves objects from a
+            # single shared stream, so serializing pages on threads isn't safe
+            for i, page in enumerate(reader.pages):
+                writer = PdfWriter()
+                writer.add_page(page)
+                output_file = Path(output_dir) / f"page_{i+1:03d}.pdf"
+                
+                with open(output_file, 'wb') as f:
+                    writer.write(f)
+            page_count = len(reader.pages)
         
-        print(f"Successfully split {len(reader.pages)} pages to: {output_dir}/")
+        print(f"Successfully split {page_count} pages to: {output_dir}/")
         return True
-    except ImportError:
-        print("Error: PyPDF2 not installed. Run: pip install PyPDF2", file=sys.stderr)
-        return False
     except Exception as e:
         print(f"Error splitting PDF: {e}", file=sys.stderr)
         return False
@@ -103,27 +185,30 @@ def split_pdf(input_path: str, output_dir: str):
 
 def extract_pages(input_path: str, pages: str, output_path: str):
     """Extract specific pages from a PDF."""
+    if not _require_pypdf2():
+        return False
+    
     try:
-        from PyPDF2 import PdfReader, PdfWriter
-        
-        reader = PdfReader(input_path)
-        writer = PdfWriter()
+        with _open_reader(input_path) as reader:
+            writer = PdfWriter()
         
-        # Parse page ranges (e.g., "1-5,7,9-10")
-        page_nums = []
-        for part in pages.split(','):
-            if '-' in part:
-                start, end = map(int, part.split('-'))
-                page_nums.extend(range(start - 1, end))  # Convert to 0-based
-            else:
-                page_nums.append(int(part) - 1)  # Convert to 0-based
+            reader_pages = reader.pages
+            n = len(reader_pages)
         
-        for i in page_nums:
-            if 0 <= i < len(reader.pages):
-                writer.add_page(reader.pages[i])
+            # Parse page ranges (e.g., "1-5,7,9-10") and add pages in the same pass
+            for part in pages.split(','):
+                if '-' in part:
+                    start, end = part.split('-', 1)
+                    lo, hi = int(start) - 1, int(end)  # Convert to 0-based
+                    for i in range(max(lo, 0), min(hi, n)):
+                        writer.add_page(reader_pages[i])
+                else:
+                    i = int(part) - 1  # Convert to 0-based
+                    if 0 <= i < n:
+                        writer.add_page(reader_pages[i])
         
-        with open(output_path, 'wb') as f:
-            writer.write(f)
+            with open(output_path, 'wb') as f:
+                writer.write(f)
         
         print(f"Extracted pages {pages} from {input_path} to {output_path}")
         return True
@@ -138,9 +223,13 @@ def main():
     parser.add_argument("--output", "-o", help="Output PDF file")
     parser.add_argument("--page", "-p", type=int, help="Page number to edit (1-based)")
     parser.add_argument("--instruction", "-s", help="Edit instruction (natural language)")
+    parser.add_argument("--pages", type=int, nargs='+', help="Page numbers to edit in parallel (1-based)")
+    parser.add_argument("--instructions", nargs='+',
+                        help="One instruction for all --pages, or one per page")
+    parser.add_argument("--jobs", "-j", type=int, help="Maximum parallel nano-pdf edits (default: CPU count)")
     parser.add_argument("--merge", "-m", nargs='+', help="Merge with other PDF files")
     parser.add_argument("--split", action="store_true", help="Split PDF into pages")
-    parser.add_argument("--output-dir", "-d", help="Output directory for split")
+    parser.add_argument("--output-dir", "-d", help="Output directory for split or batch edits")
     parser.add_argument("--extract", "-e", help="Extract pages (e.g., '1-5,7,9-10')")
     
     args = parser.parse_args()
@@ -168,6 +257,30 @@ def main():
         output = args.output or "extracted.pdf"
         success = extract_pages(args.input, args.extract, output)
     
+    # Handle batch edit operation
+    elif args.pages and args.instructions:
+        # Each page writes its own output file, so a repeated page would race on it
+        if len(set(args.pages)) != len(args.pages) or min(args.pages) < 1:
+            print("Error: --pages must be distinct page numbers >= 1", file=sys.stderr)
+            sys.exit(1)
+        instructions = args.instructions
+        if len(instructions) == 1:
+            instructions = instructions * len(args.pages)
+        elif len(instructions) != len(args.pages):
+            print("Error: --instructions must give one instruction or one per page", file=sys.stderr)
+            sys.exit(1)
+        if not check_nano_pdf_installed():
+            print("nano-pdf CLI not found. For simple edits, use a PDF editor.", file=sys.stderr)
+            print("Install with: pip install nano-pdf", file=sys.stderr)
+            sys.exit(1)
+        
+        output_dir = Path(args.output_dir or ".")
+        output_dir.mkdir(parents=True, exist_ok=True)
+        name = Path(args.input).name
+        jobs = [(page, instr, str(output_dir / f"edited_p{page}_{name}"))
+                for page, instr in zip(args.pages, instructions)]
+        success = edit_pages_with_nanopdf(args.input, jobs, args.jobs)
+    
     # Handle edit operation
     elif args.page and args.instruction:
         if check_nano_pdf_installed():
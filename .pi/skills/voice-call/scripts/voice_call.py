@@ -9,11 +9,63 @@ Usage:
 """
 
 import argparse
+import asyncio
+import base64
+import http.client
+import io
+import itertools
 import json
 import os
+import select
 import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import xml.etree.ElementTree as ElementTree
 from datetime import datetime
 from pathlib import Path
+from xml.sax.saxutils import escape as xml_escape
+
+_TWIML_SAY = '<Response><Say>{}</Say></Response>'
+_TWIML_RAW = '<Response>{}</Response>'
+
+
+def _is_connection_dropped(conn) -> bool:
+    """Return True if the server has closed an idle keep-alive connection.
+    
+    An idle socket should have nothing to read; if select reports it readable,
+    the peer has sent EOF (or unexpected data) and it must not be reused.
+    """
+    sock = conn.sock
+    if sock is None:
+        return False
+    try:
+        readable, _, _ = select.select([sock], [], [], 0)
+    except (OSError, ValueError):
+        return True
+    return bool(readable)
+
+
+def _https_connection(host: str, timeout: float) -> http.client.HTTPSConnection:
+    """Open an HTTPS connection to host, tunnelling through HTTPS_PROXY if set."""
+    proxy = urllib.request.getproxies().get('https')
+    if not proxy or urllib.request.proxy_bypass(host):
+        return http.client.HTTPSConnection(host, timeout=timeout)
+    parts = urllib.parse.urlsplit(proxy if '://' in proxy else 'http://' + proxy)
+    conn = http.client.HTTPSConnection(parts.hostname, parts.port or 8080, timeout=timeout)
+    tunnel_headers = {}
+    if parts.username:
+        creds = f"{urllib.parse.unquote(parts.username)}:{urllib.parse.unquote(parts.password or '')}"
+        tunnel_headers['Proxy-Authorization'] = 'Basic ' + base64.b64encode(creds.encode()).decode()
+    conn.set_tunnel(host, 443, headers=tunnel_headers)
+    return conn
+
+
+def emit(*lines: str):
+    """Write a block of output lines with a single stdout write."""
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 class VoiceCallProvider:
@@ -25,6 +77,24 @@ class VoiceCallProvider:
     def initiate_call(self, to_number: str, message: str = None, ssml: str = None, webhook_url: str = None):
         raise NotImplementedError
     
+    def initiate_calls(self, to_numbers: list, message: str = None, ssml: str = None, webhook_url: str = None,
+                       concurrency: int = 1, rpm: int = 0):
+        """Call each number in turn, starting at most rpm calls per minute.
+        
+        Calls never overlap here, so concurrency is always satisfied; providers
+        with non-blocking I/O override this to run several at once.
+        """
+        interval = 60.0 / rpm if rpm > 0 else 0.0
+        next_start = time.monotonic()
+        results = []
+        for n in to_numbers:
+            delay = next_start - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            next_start = time.monotonic() + interval
+            results.append(self.initiate_call(n, message=message, ssml=ssml, webhook_url=webhook_url))
+        return results
+    
     def get_status(self, call_id: str):
         raise NotImplementedError
     
@@ -38,9 +108,17 @@ class MockProvider(VoiceCallProvider):
     def __init__(self):
         super().__init__()
         self.calls = {}
+        self._counter = itertools.count(1)
+    
+    def to_json(self, call: dict) -> dict:
+        """Return a JSON-ready copy of a call, formatting its timestamp."""
+        data = dict(call)
+        created_ns = data.pop('created_ns')
+        data['created_at'] = datetime.fromtimestamp(created_ns / 1e9).isoformat()
+        return data
     
     def initiate_call(self, to_number: str, message: str = None, ssml: str = None, webhook_url: str = None):
-        call_id = f"MOCK_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        call_id = f"MOCK_{next(self._counter):08d}"
         call_data = {
             'id': call_id,
             'to': to_number,
@@ -48,16 +126,18 @@ class MockProvider(VoiceCallProvider):
             'message': message or ssml,
             'type': 'ssml' if ssml else 'text',
             'status': 'queued',
-            'created_at': datetime.now().isoformat(),
+            'created_ns': time.time_ns(),
             'webhook_url': webhook_url
         }
         self.calls[call_id] = call_data
         
-        print(f"📞 [MOCK] Call initiated: {call_id}")
-        print(f"   To: {to_number}")
-        print(f"   From: {self.from_number}")
-        print(f"   Message: {message or ssml[:100]}...")
-        print(f"   Status: queued")
+        emit(
+            f"📞 [MOCK] Call initiated: {call_id}",
+            f"   To: {to_number}",
+            f"   From: {self.from_number}",
+            f"   Message: {message or ssml[:100]}...",
+            "   Status: queued",
+        )
         
         return {'success': True, 'call_id': call_id, 'status': 'queued'}
     
@@ -73,13 +153,16 @@ class MockProvider(VoiceCallProvider):
             call['status'] = 'completed'
             call['duration'] = 30
         
-        print(f"📊 [MOCK] Call status: {call_id}")
-        print(f"   Status: {call['status']}")
-        print(f"   To: {call['to']}")
+        lines = [
+            f"📊 [MOCK] Call status: {call_id}",
+            f"   Status: {call['status']}",
+            f"   To: {call['to']}",
+        ]
         if 'duration' in call:
-            print(f"   Duration: {call['duration']}s")
+            lines.append(f"   Duration: {call['duration']}s")
+        emit(*lines)
         
-        return call
+        return self.to_json(call)
     
     def hangup(self, call_id: str):
         if call_id not in self.calls:
@@ -109,7 +192,17 @@ class TwilioProvider(VoiceCallProvider):
             sys.exit(1)
     
     def initiate_call(self, to_number: str, message: str = None, ssml: str = None, webhook_url: str = None):
-        twiml_content = f'<Response><Say>{message}</Say></Response>' if message else f'<Response>{ssml}</Response>'
+        if message:
+            twiml_content = _TWIML_SAY.format(xml_escape(message))
+        else:
+            # Reject malformed SSML here rather than letting Twilio fail the call;
+            # parse the wrapped document so several sibling verbs are accepted
+            twiml_content = _TWIML_RAW.format(ssml)
+            try:
+                ElementTree.fromstring(twiml_content)
+            except ElementTree.ParseError as e:
+                print(f"Error: invalid SSML: {e}", file=sys.stderr)
+                return {'success': False, 'error': f'invalid SSML: {e}'}
         
         call = self.client.calls.create(
             to=to_number,
@@ -118,18 +211,22 @@ class TwilioProvider(VoiceCallProvider):
             status_callback=webhook_url
         )
         
-        print(f"📞 Call initiated via Twilio")
-        print(f"   Call ID: {call.sid}")
-        print(f"   To: {to_number}")
-        print(f"   Status: {call.status}")
+        emit(
+            "📞 Call initiated via Twilio",
+            f"   Call ID: {call.sid}",
+            f"   To: {to_number}",
+            f"   Status: {call.status}",
+        )
         
         return {'success': True, 'call_id': call.sid, 'status': call.status}
     
     def get_status(self, call_id: str):
         call = self.client.calls(call_id).fetch()
-        print(f"📊 Call status: {call_id}")
-        print(f"   Status: {call.status}")
-        print(f"   Duration: {call.duration}s" if call.duration else "")
+        emit(
+            f"📊 Call status: {call_id}",
+            f"   Status: {call.status}",
+            f"   Duration: {call.duration}s" if call.duration else "",
+        )
         return {'success': True, 'call_id': call.sid, 'status': call.status, 'duration': call.duration}
     
     def hangup(self, call_id: str):
@@ -149,17 +246,58 @@ class TelnyxProvider(VoiceCallProvider):
         if not self.api_key or not self.connection_id:
             raise ValueError("Telnyx credentials not configured")
         
-        # Simple HTTP client (no external dependency)
-        self.base_url = "https://api.telnyx.com/v2/calls"
-        self.headers = {
-            'Authorization': f'Bearer {self.api_key}',
-            'Content-Type': 'application/json'
-        }
+        # Simple HTTP client (no external dependency); each thread keeps one
+        # keep-alive connection that is reused for all of its requests
+        self.host = "api.telnyx.com"
+        self.base_path = "/v2/calls"
+        # Built once; GETs carry no body, so they skip Content-Type
+        self._get_headers = {'Authorization': f'Bearer {self.api_key}'}
+        self._post_headers = {**self._get_headers, 'Content-Type': 'application/json'}
+        self._local = threading.local()
     
-    def initiate_call(self, to_number: str, message: str = None, ssml: str = None, webhook_url: str = None):
-        import urllib.request
-        import urllib.error
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = _https_connection(self.host, timeout=30)
+        elif _is_connection_dropped(conn):
+            # Reopen before sending so a POST never goes out on a dead socket
+            conn.close()
+            self._local.reused = False
+        return conn
+    
+    def _request(self, method: str, path: str, data: bytes = None):
+        """Send a request over the persistent connection and return the raw body."""
+        conn = self._connection()
+        headers = self._get_headers if data is None else self._post_headers
+        # Only a connection that already served a request can be a stale keep-alive
+        reused = getattr(self._local, 'reused', False)
+        sent = False
+        try:
+            try:
+                conn.request(method, path, body=data, headers=headers)
+                sent = True
+                response = conn.getresponse()
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                # Reconnect once for a stale keep-alive, but never resend a POST whose
+                # body already went out: Telnyx may have acted on it (e.g. placed the call)
+                if not reused or (sent and method != 'GET'):
+                    raise
+                conn.close()
+                conn.request(method, path, body=data, headers=headers)
+                response = conn.getresponse()
+            body = response.read()
+        except BaseException:
+            conn.close()
+            self._local.reused = False
+            raise
+        self._local.reused = True
         
+        if response.status >= 400:
+            raise urllib.error.HTTPError(f"https://{self.host}{path}", response.status,
+                                         response.reason, response.headers, io.BytesIO(body))
+        return body
+    
+    def initiate_call(self, to_number: str, message: str = None, ssml: str = None, webhook_url: str = None):
         call_control_payload = {
             "from": self.from_number,
             "to": to_number,
@@ -172,41 +310,70 @@ class TelnyxProvider(VoiceCallProvider):
         elif ssml:
             call_control_payload["tts"] = {"ssml": ssml}
         
-        data = json.dumps(call_control_payload).encode('utf-8')
-        req = urllib.request.Request(self.base_url, data=data, headers=self.headers, method='POST')
+        data = json.dumps(call_control_payload, separators=(',', ':')).encode()
         
         try:
-            response = urllib.request.urlopen(req)
-            result = json.loads(response.read().decode('utf-8'))
+            result = json.loads(self._request('POST', self.base_path, data))
             call_id = result['data']['id']
             
-            print(f"📞 Call initiated via Telnyx")
-            print(f"   Call ID: {call_id}")
-            print(f"   To: {to_number}")
+            emit(
+                "📞 Call initiated via Telnyx",
+                f"   Call ID: {call_id}",
+                f"   To: {to_number}",
+            )
             
             return {'success': True, 'call_id': call_id, 'status': 'active'}
         except urllib.error.HTTPError as e:
-            error_msg = json.loads(e.read().decode('utf-8'))
+            error_msg = json.loads(e.read())
             print(f"Error: {error_msg}", file=sys.stderr)
             return {'success': False, 'error': str(error_msg)}
         except Exception as e:
             print(f"Error: {e}", file=sys.stderr)
             return {'success': False, 'error': str(e)}
     
-    def get_status(self, call_id: str):
-        import urllib.request
-        import urllib.error
+    async def initiate_call_async(self, to_number: str, message: str = None, ssml: str = None,
+                                  webhook_url: str = None):
+        """Run initiate_call on a worker thread so several calls can be in flight."""
+        return await asyncio.to_thread(self.initiate_call, to_number, message, ssml, webhook_url)
+    
+    async def _batch(self, to_numbers: list, message: str, ssml: str, webhook_url: str,
+                     concurrency: int, rpm: int):
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        interval = 60.0 / rpm if rpm > 0 else 0.0
+        lock = asyncio.Lock()
+        loop = asyncio.get_running_loop()
+        next_start = loop.time()
         
-        url = f"{self.base_url}/{call_id}"
-        req = urllib.request.Request(url, headers=self.headers, method='GET')
+        async def call(to_number):
+            nonlocal next_start
+            async with semaphore:
+                if interval:
+                    # Space call starts evenly so the batch stays under the RPM limit
+                    async with lock:
+                        wait = next_start - loop.time()
+                        next_start = max(next_start, loop.time()) + interval
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                return await self.initiate_call_async(to_number, message, ssml, webhook_url)
+        
+        return await asyncio.gather(*(call(n) for n in to_numbers))
+    
+    def initiate_calls(self, to_numbers: list, message: str = None, ssml: str = None, webhook_url: str = None,
+                       concurrency: int = 5, rpm: int = 0):
+        """Place calls to several numbers concurrently."""
+        return asyncio.run(self._batch(to_numbers, message, ssml, webhook_url, concurrency, rpm))
+    
+    def get_status(self, call_id: str):
+        path = f"{self.base_path}/{call_id}"
         
         try:
-            response = urllib.request.urlopen(req)
-            result = json.loads(response.read().decode('utf-8'))
+            result = json.loads(self._request('GET', path))
             call_data = result['data']
             
-            print(f"📊 Call status: {call_id}")
-            print(f"   Status: {call_data['status']}")
+            emit(
+                f"📊 Call status: {call_id}",
+                f"   Status: {call_data['status']}",
+            )
             
             return {'success': True, 'call_id': call_id, 'status': call_data['status']}
         except Exception as e:
@@ -214,15 +381,11 @@ class TelnyxProvider(VoiceCallProvider):
             return {'success': False, 'error': str(e)}
     
     def hangup(self, call_id: str):
-        import urllib.request
-        import urllib.error
-        
-        url = f"{self.base_url}/{call_id}/actions/hangup"
-        data = json.dumps({}).encode('utf-8')
-        req = urllib.request.Request(url, data=data, headers=self.headers, method='POST')
+        path = f"{self.base_path}/{call_id}/actions/hangup"
+        data = b'{}'
         
         try:
-            response = urllib.request.urlopen(req)
+            self._request('POST', path, data)
             print(f"⏹️  Call ended: {call_id}")
             return {'success': True, 'call_id': call_id, 'status': 'completed'}
         except Exception as e:
@@ -251,13 +414,15 @@ def get_provider():
 
 def main():
     parser = argparse.ArgumentParser(description="Voice calling for PopeBot")
-    parser.add_argument("--to", "-t", help="Destination phone number (e.g., +15555550123)")
+    parser.add_argument("--to", "-t", nargs='+', help="Destination phone number(s) (e.g., +15555550123)")
     parser.add_argument("--message", "-m", help="Text message for TTS")
     parser.add_argument("--ssml", "-s", help="SSML for custom voice synthesis")
     parser.add_argument("--webhook-url", "-w", help="Webhook URL for call events")
     parser.add_argument("--call-id", "-c", help="Call ID for status/hangup")
     parser.add_argument("--status", action="store_true", help="Get call status")
     parser.add_argument("--hangup", action="store_true", help="End an active call")
+    parser.add_argument("--concurrency", type=int, default=5, help="Maximum calls in flight when calling several numbers (Telnyx; other providers call one at a time)")
+    parser.add_argument("--rpm", type=int, default=0, help="Maximum calls started per minute (0 = unlimited)")
     
     args = parser.parse_args()
     
@@ -280,9 +445,19 @@ def main():
         result = provider.get_status(args.call_id)
     elif args.hangup:
         result = provider.hangup(args.call_id)
+    elif len(args.to) > 1:
+        results = provider.initiate_calls(
+            args.to,
+            message=args.message,
+            ssml=args.ssml,
+            webhook_url=args.webhook_url,
+            concurrency=args.concurrency,
+            rpm=args.rpm
+        )
+        sys.exit(0 if all(r.get('success') for r in results) else 1)
     else:
         result = provider.initiate_call(
-            args.to,
+            args.to[0],
             message=args.message,
             ssml=args.ssml,
             webhook_url=args.webhook_url
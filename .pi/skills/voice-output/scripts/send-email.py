@@ -3,13 +3,63 @@
 Simple SMTP email sender using Python's built-in smtplib.
 This script can send emails when proper SMTP credentials are configured.
 """
+import atexit
 import smtplib
 import os
 import sys
+import threading
 from email.message import EmailMessage
 
+# Logged-in SMTP session per thread, reused across sends
+_local = threading.local()
+
+def _get_smtp(user, password):
+    """Return this thread's SMTP session, reconnecting if it has gone stale."""
+    server = getattr(_local, 'server', None)
+    if server is not None and _local.user == user:
+        try:
+            if server.noop()[0] == 250:
+                return server
+        except (smtplib.SMTPException, OSError):
+            pass
+    close_smtp()
+    
+    server = smtplib.SMTP_SSL('smtp.gmail.com', 465)
+    try:
+        server.login(user, password)
+    except BaseException:
+        server.close()
+        raise
+    _local.server = server
+    _local.user = user
+    return server
+
+def close_smtp():
+    """Quit this thread's cached SMTP session, if any."""
+    server = getattr(_local, 'server', None)
+    _local.server = None
+    if server is not None:
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+
+atexit.register(close_smtp)
+
+def _send(msg, user, password):
+    try:
+        _get_smtp(user, password).send_message(msg)
+    except smtplib.SMTPServerDisconnected:
+        # The cached session was dropped between the NOOP check and the send
+        close_smtp()
+        _get_smtp(user, password).send_message(msg)
+
 def send_email(to, subject, body, smtp_user=None, smtp_pass=None):
-    """Send an email via Gmail SMTP."""
+    """Send an email via Gmail SMTP.
+    
+    `to` may be one address or a list; each recipient gets their own message,
+    all sent over a single SMTP session.
+    """
     
     # Use environment variables or defaults
     user = smtp_user or os.environ.get('POPEBOT_EMAIL_USER')
@@ -21,26 +71,37 @@ def send_email(to, subject, body, smtp_user=None, smtp_pass=None):
         print("For Gmail, use an App Password (16 characters).")
         return False
     
-    msg = EmailMessage()
-    msg.set_content(body)
-    msg['Subject'] = subject
-    msg['From'] = f"PopeBot Agent <{user}>"
-    msg['To'] = to
-    
-    try:
-        server = smtplib.SMTP_SSL('smtp.gmail.com', 465)
-        server.login(user, password)
-        server.send_message(msg)
-        server.quit()
-        print(f"✓ Email sent successfully to {to}")
-        return True
-    except Exception as e:
-        print(f"ERROR: Failed to send email: {e}")
-        return False
+    recipients = [to] if isinstance(to, str) else list(to)
+    sent = 0
+    for rcpt in recipients:
+        msg = EmailMessage()
+        msg.set_content(body)
+        msg['Subject'] = subject
+        msg['From'] = f"PopeBot Agent <{user}>"
+        msg['To'] = rcpt
+        
+        try:
+            _send(msg, user, password)
+            print(f"✓ Email sent successfully to {rcpt}")
+            sent += 1
+        except (smtplib.SMTPAuthenticationError, smtplib.SMTPConnectError,
+                smtplib.SMTPServerDisconnected) as e:
+            # Every remaining recipient would fail the same way; stop here
+            print(f"ERROR: Failed to send email: {e}")
+            return False
+        except smtplib.SMTPException as e:
+            print(f"ERROR: Failed to send email: {e}")
+        except OSError as e:
+            # Socket-level failure (refused, timeout, DNS): the server is unreachable
+            print(f"ERROR: Failed to send email: {e}")
+            return False
+        except Exception as e:
+            print(f"ERROR: Failed to send email: {e}")
+    return sent == len(recipients)
 
 if __name__ == "__main__":
     if len(sys.argv) < 4:
-        print("Usage: send-email.py <to> <subject> <body>")
+        print("Usage: send-email.py <to>[,<to>...] <subject> <body>")
         sys.exit(1)
     
-    send_email(sys.argv[1], sys.argv[2], sys.argv[3])
+    send_email([addr.strip() for addr in sys.argv[1].split(',')], sys.argv[2], sys.argv[3])
\ No newline at end of file